@@ -1,115 +1,142 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import AsyncIterable, AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
 from app.core.database import get_database_session
 from app.core.auth import current_active_user
-from app.models.database import User, FamilyTree
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.streaming import iter_json_array, iter_json_object
+from app.models.database import User, FamilyTree, Person, Relationship
 from app.schemas.schemas import (
     FamilyTreeCreate, 
     FamilyTreeRead, 
     FamilyTreeUpdate,
     FamilyTreeGraph,
+    GraphNode,
+    GraphEdge,
+    PersonRead,
+    RelationshipRead,
     MessageResponse
 )
 from app.services.family_tree_service import FamilyTreeService
+from app.services.person_service import PersonService
+from app.services.relationship_service import RelationshipService
 
 router = APIRouter()
 
+async def iter_graph_nodes(people: AsyncIterable[Person]) -> AsyncIterator[GraphNode]:
+    """Helper function to wrap streamed people as graph nodes"""
+    async for person in people:
+        yield GraphNode(id=str(person.id), type="person", data=PersonRead.model_validate(person))
+
+async def iter_graph_edges(relationships: AsyncIterable[Relationship]) -> AsyncIterator[GraphEdge]:
+    """Helper function to wrap streamed relationships as graph edges"""
+    async for relationship in relationships:
+        yield GraphEdge(
+            id=str(relationship.id),
+            source=str(relationship.from_person_id),
+            target=str(relationship.to_person_id),
+            type=relationship.relationship_type,
+            data=RelationshipRead.model_validate(relationship)
+        )
+
 @router.post("/", response_model=FamilyTreeRead, status_code=status.HTTP_201_CREATED)
 async def create_family_tree(
     family_tree_data: FamilyTreeCreate,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Create a new family tree"""
     service = FamilyTreeService(db)
-    return service.create_family_tree(current_user.id, family_tree_data)
+    return await service.create_family_tree(current_user.id, family_tree_data)
 
 @router.get("/", response_model=List[FamilyTreeRead])
 async def get_user_family_trees(
-    db: Session = Depends(get_database_session),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    after: Optional[str] = Query(None, description=f"{NEXT_CURSOR_HEADER} header of the previous page"),
+    search: Optional[str] = Query(None, min_length=1, max_length=255),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Get all family trees for the current user"""
     service = FamilyTreeService(db)
-    return service.get_user_family_trees(current_user.id)
+    family_trees = await service.get_user_family_trees(
+        current_user.id,
+        limit=limit,
+        after=decode_cursor(after) if after is not None else None,
+        search=search
+    )
+    
+    # A full page may have more rows after it
+    if limit is not None and len(family_trees) == limit:
+        last = family_trees[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    
+    return family_trees
 
 @router.get("/{family_tree_id}", response_model=FamilyTreeRead)
 async def get_family_tree(
     family_tree_id: uuid.UUID,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Get a specific family tree"""
     service = FamilyTreeService(db)
-    family_tree = service.get_family_tree(family_tree_id)
-    
-    # Check ownership
-    if family_tree.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this family tree"
-        )
-    
-    return family_tree
+    return await service.get_owned(family_tree_id, current_user.id)
 
 @router.put("/{family_tree_id}", response_model=FamilyTreeRead)
 async def update_family_tree(
     family_tree_id: uuid.UUID,
     update_data: FamilyTreeUpdate,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Update a family tree"""
     service = FamilyTreeService(db)
-    family_tree = service.get_family_tree(family_tree_id)
-    
     # Check ownership
-    if family_tree.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this family tree"
-        )
+    await service.get_owned(family_tree_id, current_user.id, action="update")
     
-    return service.update_family_tree(family_tree_id, update_data)
+    return await service.update_family_tree(family_tree_id, update_data)
 
 @router.delete("/{family_tree_id}", response_model=MessageResponse)
 async def delete_family_tree(
     family_tree_id: uuid.UUID,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Delete a family tree"""
     service = FamilyTreeService(db)
-    family_tree = service.get_family_tree(family_tree_id)
-    
     # Check ownership
-    if family_tree.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this family tree"
-        )
+    await service.get_owned(family_tree_id, current_user.id, action="delete")
     
-    service.delete_family_tree(family_tree_id)
+    await service.delete_family_tree(family_tree_id)
     return MessageResponse(message="Family tree deleted successfully")
 
 @router.get("/{family_tree_id}/graph", response_model=FamilyTreeGraph)
 async def get_family_tree_graph(
     family_tree_id: uuid.UUID,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Get family tree data formatted for graph visualization"""
     service = FamilyTreeService(db)
-    family_tree = service.get_family_tree(family_tree_id)
-    
     # Check ownership
-    if family_tree.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this family tree"
-        )
+    await service.get_owned(family_tree_id, current_user.id)
     
-    return service.get_family_tree_graph(family_tree_id)
\ No newline at end of file
+    # Stream the graph so large trees are never fully materialized in memory
+    person_service = PersonService(db)
+    relationship_service = RelationshipService(db)
+    return StreamingResponse(
+        iter_json_object({
+            "nodes": iter_json_array(
+                iter_graph_nodes(person_service.iter_people_by_family_tree(family_tree_id)), GraphNode
+            ),
+            "edges": iter_json_array(
+                iter_graph_edges(relationship_service.iter_family_tree_relationships(family_tree_id)), GraphEdge
+            )
+        }),
+        media_type="application/json"
+    )
\ No newline at end of file
@@ -1,10 +1,13 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
 from app.core.database import get_database_session
 from app.core.auth import current_active_user
+from app.core.query_counter import query_budget
+from app.core.streaming import iter_json_array
 from app.models.database import User
 from app.schemas.schemas import (
     RelationshipCreate, 
@@ -16,92 +19,129 @@ from app.services.relationship_service import RelationshipService
 from app.services.person_service import PersonService
 from app.services.family_tree_service import FamilyTreeService
 
+# Each endpoint's query_budget counts the user lookup on an auth cache miss
 router = APIRouter()
 
-async def check_person_ownership(person_id: uuid.UUID, current_user: User, db: Session):
+async def check_person_ownership(person_id: uuid.UUID, current_user: User, db: AsyncSession):
     """Helper function to check if user owns the family tree containing the person"""
     person_service = PersonService(db)
-    person = person_service.get_person(person_id)
+    owner_id = await person_service.get_owner_id(person_id)
     
-    family_tree_service = FamilyTreeService(db)
-    family_tree = family_tree_service.get_family_tree(person.family_tree_id)
-    
-    if family_tree.owner_id != current_user.id:
+    if owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this family tree"
         )
+
+async def check_people_ownership(person_ids: List[uuid.UUID], current_user: User, db: AsyncSession):
+    """Helper function to check ownership of several people with a single query"""
+    person_service = PersonService(db)
+    people_with_owners = await person_service.get_people_with_owners(person_ids)
+    
+    for person_id in person_ids:
+        if person_id not in people_with_owners:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Person not found"
+            )
+        
+        if people_with_owners[person_id][1] != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this family tree"
+            )
     
-    return person
+    return [people_with_owners[person_id][0] for person_id in person_ids]
 
 @router.post("/", response_model=RelationshipRead, status_code=status.HTTP_201_CREATED)
+@query_budget(4)
 async def create_relationship(
     relationship_data: RelationshipCreate,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Create a new relationship between two people"""
     # Check if user owns both people's family trees
-    await check_person_ownership(relationship_data.from_person_id, current_user, db)
-    await check_person_ownership(relationship_data.to_person_id, current_user, db)
+    people = await check_people_ownership(
+        [relationship_data.from_person_id, relationship_data.to_person_id], current_user, db
+    )
     
+    # Reuse the loaded family tree IDs instead of selecting the same people again
     relationship_service = RelationshipService(db)
-    return relationship_service.create_relationship(relationship_data)
+    return await relationship_service.create_relationship(
+        relationship_data,
+        family_tree_ids={person.id: person.family_tree_id for person in people}
+    )
+
+@router.post("/batch", response_model=List[RelationshipRead], status_code=status.HTTP_201_CREATED)
+@query_budget(4)
+async def create_relationships_batch(
+    relationships_data: List[RelationshipCreate] = Body(..., min_length=1, max_length=500),
+    db: AsyncSession = Depends(get_database_session),
+    current_user: User = Depends(current_active_user)
+):
+    """Create several relationships at once"""
+    # Check if user owns every referenced person's family tree in one query
+    person_ids = list(dict.fromkeys(
+        person_id
+        for relationship_data in relationships_data
+        for person_id in (relationship_data.from_person_id, relationship_data.to_person_id)
+    ))
+    people = await check_people_ownership(person_ids, current_user, db)
+    
+    # Reuse the loaded family tree IDs instead of selecting the same people again
+    relationship_service = RelationshipService(db)
+    return await relationship_service.create_relationships(
+        relationships_data,
+        family_tree_ids={person.id: person.family_tree_id for person in people}
+    )
 
 @router.get("/{relationship_id}", response_model=RelationshipRead)
+@query_budget(2)
 async def get_relationship(
     relationship_id: uuid.UUID,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Get a specific relationship"""
     relationship_service = RelationshipService(db)
-    relationship = relationship_service.get_relationship(relationship_id)
-    
-    # Check if user owns both people's family trees
-    await check_person_ownership(relationship.from_person_id, current_user, db)
-    await check_person_ownership(relationship.to_person_id, current_user, db)
-    
-    return relationship
+    return await relationship_service.get_owned_relationship(relationship_id, current_user.id)
 
 @router.put("/{relationship_id}", response_model=RelationshipRead)
+@query_budget(4)
 async def update_relationship(
     relationship_id: uuid.UUID,
     update_data: RelationshipUpdate,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Update a relationship"""
     relationship_service = RelationshipService(db)
-    relationship = relationship_service.get_relationship(relationship_id)
+    # Check if user owns both people's family trees; the loaded row stays in the session for the update
+    relationship = await relationship_service.get_owned_relationship(relationship_id, current_user.id)
     
-    # Check if user owns both people's family trees
-    await check_person_ownership(relationship.from_person_id, current_user, db)
-    await check_person_ownership(relationship.to_person_id, current_user, db)
-    
-    return relationship_service.update_relationship(relationship_id, update_data)
+    return await relationship_service.update_relationship(relationship.id, update_data)
 
 @router.delete("/{relationship_id}", response_model=MessageResponse)
+@query_budget(3)
 async def delete_relationship(
     relationship_id: uuid.UUID,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Delete a relationship"""
     relationship_service = RelationshipService(db)
-    relationship = relationship_service.get_relationship(relationship_id)
-    
-    # Check if user owns both people's family trees
-    await check_person_ownership(relationship.from_person_id, current_user, db)
-    await check_person_ownership(relationship.to_person_id, current_user, db)
+    # Check if user owns both people's family trees; the loaded row stays in the session for the delete
+    relationship = await relationship_service.get_owned_relationship(relationship_id, current_user.id)
     
-    relationship_service.delete_relationship(relationship_id)
+    await relationship_service.delete_relationship(relationship.id)
     return MessageResponse(message="Relationship deleted successfully")
 
 @router.get("/person/{person_id}", response_model=List[RelationshipRead])
+@query_budget(3)
 async def get_person_relationships(
     person_id: uuid.UUID,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Get all relationships for a specific person"""
@@ -109,24 +149,31 @@ async def get_person_relationships(
     await check_person_ownership(person_id, current_user, db)
     
     relationship_service = RelationshipService(db)
-    return relationship_service.get_person_relationships(person_id)
+    return StreamingResponse(
+        iter_json_array(relationship_service.iter_person_relationships(person_id), RelationshipRead),
+        media_type="application/json"
+    )
 
 @router.get("/family-tree/{family_tree_id}", response_model=List[RelationshipRead])
+@query_budget(3)
 async def get_family_tree_relationships(
     family_tree_id: uuid.UUID,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
     current_user: User = Depends(current_active_user)
 ):
     """Get all relationships in a specific family tree"""
     # Check if user owns the family tree
     family_tree_service = FamilyTreeService(db)
-    family_tree = family_tree_service.get_family_tree(family_tree_id)
+    owner_id = await family_tree_service.get_owner_id(family_tree_id)
     
-    if family_tree.owner_id != current_user.id:
+    if owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this family tree"
         )
     
     relationship_service = RelationshipService(db)
-    return relationship_service.get_family_tree_relationships(family_tree_id)
\ No newline at end of file
+    return StreamingResponse(
+        iter_json_array(relationship_service.iter_family_tree_relationships(family_tree_id), RelationshipRead),
+        media_type="application/json"
+    )
\ No newline at end of file
@@ -1,21 +1,28 @@
+import logging
+import time
 import uuid
-from typing import Optional
+import jwt
+from typing import Any, Dict, Optional
 from fastapi import Depends, Request
-from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin
+from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin, exceptions
 from fastapi_users.authentication import (
     AuthenticationBackend,
     BearerTransport,
     JWTStrategy,
 )
 from fastapi_users.db import SQLAlchemyUserDatabase
-from sqlalchemy.orm import Session
+from fastapi_users.jwt import decode_jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.database import User
 from app.core.database import get_database_session
 from app.core.config import settings
+from app.core.auth_cache import get_cached_user, cache_user, invalidate_user
+
+logger = logging.getLogger(__name__)
 
 # User database dependency
-async def get_user_db(session: Session = Depends(get_database_session)):
+async def get_user_db(session: AsyncSession = Depends(get_database_session)):
     yield SQLAlchemyUserDatabase(session, User)
 
 # User manager
@@ -24,17 +31,33 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     verification_token_secret = settings.SECRET_KEY
 
     async def on_after_register(self, user: User, request: Optional[Request] = None):
-        print(f"User {user.id} has registered.")
+        logger.info("user_registered user_id=%s", user.id, extra={"user_id": str(user.id)})
 
     async def on_after_forgot_password(
         self, user: User, token: str, request: Optional[Request] = None
     ):
-        print(f"User {user.id} has forgot their password. Reset token: {token}")
+        # Never log the token itself: it is a password reset credential
+        logger.info("forgot_password user_id=%s", user.id, extra={"user_id": str(user.id)})
 
     async def on_after_request_verify(
         self, user: User, token: str, request: Optional[Request] = None
     ):
-        print(f"Verification requested for user {user.id}. Verification token: {token}")
+        logger.info("verification_requested user_id=%s", user.id, extra={"user_id": str(user.id)})
+
+    # Cached users must not outlive changes to their account (e.g. deactivation)
+    async def on_after_update(
+        self, user: User, update_dict: Dict[str, Any], request: Optional[Request] = None
+    ):
+        invalidate_user(user.id)
+
+    async def on_after_verify(self, user: User, request: Optional[Request] = None):
+        invalidate_user(user.id)
+
+    async def on_after_reset_password(self, user: User, request: Optional[Request] = None):
+        invalidate_user(user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        invalidate_user(user.id)
 
 async def get_user_manager(user_db=Depends(get_user_db)):
     yield UserManager(user_db)
@@ -42,15 +65,50 @@ async def get_user_manager(user_db=Depends(get_user_db)):
 # Authentication backend
 bearer_transport = BearerTransport(tokenUrl="auth/login")
 
-jwt_strategy = JWTStrategy(
+class CachedJWTStrategy(JWTStrategy):
+    """JWT strategy that skips decoding and the user SELECT for recently seen tokens"""
+
+    async def read_token(self, token, user_manager):
+        if token is None:
+            return None
+        
+        cached_user = get_cached_user(token)
+        if cached_user is not None:
+            # Attach the rebuilt user to this request's session without re-selecting the row
+            return await user_manager.user_db.session.merge(cached_user, load=False)
+        
+        # Decode here rather than in super().read_token so the token's expiry can bound the cache entry
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience, algorithms=[self.algorithm]
+            )
+            user_id = data.get("sub")
+            if user_id is None:
+                return None
+        except jwt.PyJWTError:
+            return None
+        
+        try:
+            user = await user_manager.get(user_manager.parse_id(user_id))
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+        
+        cache_user(token, user, data.get("exp", time.time() + settings.AUTH_CACHE_TTL_SECONDS))
+        return user
+
+jwt_strategy = CachedJWTStrategy(
     secret=settings.SECRET_KEY,
     lifetime_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
 )
 
+def get_jwt_strategy() -> JWTStrategy:
+    """Return the shared JWT strategy, built once at import"""
+    return jwt_strategy
+
 auth_backend = AuthenticationBackend(
     name="jwt",
     transport=bearer_transport,
-    get_strategy=lambda: jwt_strategy,
+    get_strategy=get_jwt_strategy,
 )
 
 # FastAPI Users instance
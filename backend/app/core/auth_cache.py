@@ -0,0 +1,56 @@
+import hashlib
+import time
+import uuid
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional
+from cachetools import TLRUCache
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.models.database import User
+from app.core.config import settings
+
+# Column attributes captured for each cached user
+_USER_COLUMNS = [attribute.key for attribute in inspect(User).column_attrs]
+
+class _CachedUser(NamedTuple):
+    # Plain column values, never the ORM instance: a rollback in the session that
+    # loaded it would expire its attributes for every later request
+    values: Mapping[str, Any]
+    # Wall-clock expiry of the token the user was resolved from
+    expires_at: float
+
+def _entry_expiry(key: bytes, entry: _CachedUser, now: float) -> float:
+    """Keep an entry for the configured TTL, but never past its token's own expiry"""
+    return now + min(settings.AUTH_CACHE_TTL_SECONDS, entry.expires_at - time.time())
+
+# Authenticated users keyed by a hash of their bearer token
+_user_cache: TLRUCache = TLRUCache(
+    maxsize=settings.AUTH_CACHE_MAX_SIZE,
+    ttu=_entry_expiry
+)
+
+def _token_key(token: str) -> bytes:
+    """Hash the token so raw credentials are never kept in memory"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def get_cached_user(token: str) -> Optional[User]:
+    """Rebuild a detached user from the snapshot cached for this token, if still cached"""
+    entry = _user_cache.get(_token_key(token))
+    if entry is None:
+        return None
+    
+    user = User(**entry.values)
+    make_transient_to_detached(user)
+    return user
+
+def cache_user(token: str, user: User, expires_at: float) -> None:
+    """Remember a snapshot of the user resolved for a token that expires at the given Unix time"""
+    values = MappingProxyType({key: getattr(user, key) for key in _USER_COLUMNS})
+    _user_cache[_token_key(token)] = _CachedUser(values, expires_at)
+
+def invalidate_user(user_id: uuid.UUID) -> None:
+    """Forget every cached token of a user, e.g. after their account changes"""
+    for key, entry in list(_user_cache.items()):
+        if entry.values["id"] == user_id:
+            _user_cache.pop(key, None)
\ No newline at end of file
@@ -1,37 +1,64 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import asyncio
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+# Idle connections in a scaled-to-zero instance get killed by the platform, so
+# serverless deployments skip pooling altogether
+if settings.SERVERLESS:
+    pool_options = {"poolclass": NullPool}
+else:
+    pool_options = {
+        "pool_pre_ping": True,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+# Create SQLAlchemy async engine (asyncpg) with prepared statement caching
+engine = create_async_engine(
+    make_url(settings.async_database_url).update_query_dict({
+        "prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)
+    }),
+    connect_args={
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        # JIT compilation only slows down the short OLTP queries this API runs
+        "server_settings": {"jit": "off"},
+    },
+    **pool_options
 )
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Base class for models
-Base = declarative_base()
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 # Dependency to get database session
-def get_database_session():
-    db = SessionLocal()
-    try:
+async def get_database_session():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # Database utility functions
-def create_database():
+async def create_database():
     """Create all database tables"""
     from app.models.database import Base
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+async def warm_connection_pool():
+    """Open the pool's persistent connections up front so early requests skip the connect handshake"""
+    if settings.SERVERLESS:
+        return
+    
+    async def _connect():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    
+    await asyncio.gather(*(_connect() for _ in range(settings.DB_POOL_SIZE)))
 
-def drop_database():
+async def drop_database():
     """Drop all database tables"""
     from app.models.database import Base
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
\ No newline at end of file
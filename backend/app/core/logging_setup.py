@@ -0,0 +1,39 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import settings
+
+# Queue handler on the root logger and the background writer draining it; None until started
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+def start_logging() -> None:
+    """Route log records through a queue so emitting them never blocks the event loop on I/O"""
+    global _queue_handler, _listener
+    if _listener is not None:
+        return
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    _queue_handler = QueueHandler(log_queue)
+    root_logger = logging.getLogger()
+    root_logger.addHandler(_queue_handler)
+    root_logger.setLevel(settings.LOG_LEVEL.upper())
+    
+    _listener = QueueListener(log_queue, handler)
+    _listener.start()
+
+def stop_logging() -> None:
+    """Flush any queued log records and stop the background writer"""
+    global _queue_handler, _listener
+    if _listener is None:
+        return
+    
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    _queue_handler = None
+    _listener = None
\ No newline at end of file
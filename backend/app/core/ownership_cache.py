@@ -0,0 +1,23 @@
+from typing import Optional
+from cachetools import TTLCache
+import uuid
+
+from app.core.config import settings
+
+# Family tree owner IDs keyed by family tree ID; ownership never changes after creation
+_owner_cache: TTLCache = TTLCache(
+    maxsize=settings.OWNERSHIP_CACHE_MAX_SIZE,
+    ttl=settings.OWNERSHIP_CACHE_TTL_SECONDS
+)
+
+def get_cached_owner_id(family_tree_id: uuid.UUID) -> Optional[uuid.UUID]:
+    """Get the owner ID previously looked up for this family tree, if still cached"""
+    return _owner_cache.get(family_tree_id)
+
+def cache_owner_id(family_tree_id: uuid.UUID, owner_id: uuid.UUID) -> None:
+    """Remember the owner ID of a family tree"""
+    _owner_cache[family_tree_id] = owner_id
+
+def invalidate_owner_id(family_tree_id: uuid.UUID) -> None:
+    """Forget a family tree's owner, e.g. once the tree is deleted"""
+    _owner_cache.pop(family_tree_id, None)
\ No newline at end of file
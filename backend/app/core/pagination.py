@@ -0,0 +1,24 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime
+from typing import Tuple
+from fastapi import HTTPException, status
+
+# Response header carrying the cursor of the next page when more rows may follow
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    """Encode a row's (created_at, id) sort key as an opaque keyset pagination cursor"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode a cursor made by encode_cursor back into its (created_at, id) sort key"""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
\ No newline at end of file
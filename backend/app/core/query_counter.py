@@ -0,0 +1,61 @@
+import logging
+from contextvars import ContextVar
+from typing import Callable, List, Optional, TypeVar
+from sqlalchemy import event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Statements executed by the current request; a mutable holder so increments made
+# inside SQLAlchemy's greenlet are visible to the middleware
+_query_count: ContextVar[Optional[List[int]]] = ContextVar("query_count", default=None)
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+F = TypeVar("F", bound=Callable)
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """Give an endpoint its own SQL statement budget, overriding QUERY_BUDGET"""
+    def decorator(endpoint: F) -> F:
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorator
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in strict mode when a request runs more SQL statements than its budget"""
+
+class QueryCounterMiddleware:
+    """Count SQL statements per request and flag requests that exceed their endpoint's budget"""
+
+    def __init__(self, app: ASGIApp, budget: Optional[int] = None, strict: bool = False):
+        self.app = app
+        self.budget = budget
+        self.strict = strict
+        # Only hook statement execution once counting is actually switched on
+        if not event.contains(engine.sync_engine, "before_cursor_execute", _count_query):
+            event.listen(engine.sync_engine, "before_cursor_execute", _count_query)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        counter = [0]
+        token = _query_count.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _query_count.reset(token)
+        
+        # The router records the matched endpoint in the shared scope
+        budget = getattr(scope.get("endpoint"), "query_budget", self.budget)
+        if budget is not None and counter[0] > budget:
+            message = f"{scope['method']} {scope['path']} ran {counter[0]} SQL statements (budget {budget})"
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
\ No newline at end of file
@@ -0,0 +1,25 @@
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Type
+from pydantic import BaseModel
+
+async def iter_json_array(rows: AsyncIterable[Any], schema: Type[BaseModel]) -> AsyncIterator[bytes]:
+    """Encode rows as a JSON array through the response schema, one row at a time"""
+    yield b'['
+    
+    index = 0
+    async for row in rows:
+        yield (b',' if index else b'') + schema.model_validate(row).model_dump_json().encode()
+        index += 1
+    
+    yield b']'
+
+async def iter_json_object(members: Dict[str, AsyncIterable[bytes]]) -> AsyncIterator[bytes]:
+    """Encode a JSON object whose member values are themselves streamed, one member after another"""
+    yield b'{'
+    
+    for index, (name, value) in enumerate(members.items()):
+        yield (b',' if index else b'') + json.dumps(name).encode() + b':'
+        async for chunk in value:
+            yield chunk
+    
+    yield b'}'
\ No newline at end of file
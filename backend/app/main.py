@@ -1,30 +1,43 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from sqlalchemy.exc import SQLAlchemyError
 from contextlib import asynccontextmanager
+import logging
+import orjson
 
 from app.core.config import settings
-from app.core.database import create_database
+from app.core.database import create_database, warm_connection_pool
+from app.core.logging_setup import start_logging, stop_logging
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.query_counter import QueryCounterMiddleware
 from app.core.auth import fastapi_users, auth_backend, current_active_user
 from app.schemas.schemas import UserCreate, UserRead, UserUpdate
 from app.api.v1.api import api_router
 from app.models.database import User
 
+logger = logging.getLogger(__name__)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("Starting up...")
-    create_database()
+    start_logging()
+    logger.info("Starting up...")
+    await create_database()
+    await warm_connection_pool()
     yield
     # Shutdown
-    print("Shutting down...")
+    logger.info("Shutting down...")
+    stop_logging()
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     debug=settings.DEBUG,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -34,8 +47,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Compress larger responses (tree graphs and relationship lists are highly repetitive JSON)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # Include authentication routes
 app.include_router(
     fastapi_users.get_auth_router(auth_backend),
@@ -70,24 +87,39 @@ app.include_router(
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
+# Flag requests that run more SQL statements than their endpoint's budget or QUERY_BUDGET;
+# off unless configured, and strict mode (tests/CI) fails on regressions
+if settings.QUERY_BUDGET is not None or settings.QUERY_BUDGET_STRICT:
+    app.add_middleware(
+        QueryCounterMiddleware,
+        budget=settings.QUERY_BUDGET,
+        strict=settings.QUERY_BUDGET_STRICT
+    )
+
 # Root endpoint
 @app.get("/")
 async def root():
     return {"message": "Family Tree API", "version": settings.VERSION}
 
-# Health check endpoint
+# Health check endpoint - the body never changes, so encode it once at import
+HEALTH_RESPONSE_BODY = orjson.dumps(
+    {"status": "healthy", "timestamp": "2024-01-01T00:00:00Z"}
+)
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": "2024-01-01T00:00:00Z"}
+    return Response(content=HEALTH_RESPONSE_BODY, media_type="application/json")
 
 # Protected endpoint example
 @app.get("/protected")
 async def protected_route(user: User = Depends(current_active_user)):
     return {"message": f"Hello {user.email}! This is a protected route."}
 
-# Global exception handler
-@app.exception_handler(Exception)
-async def global_exception_handler(request, exc):
+# Database errors must not leak SQL or connection details; anything else unexpected
+# falls through to Starlette's ServerErrorMiddleware
+@app.exception_handler(SQLAlchemyError)
+async def database_exception_handler(request, exc):
+    logger.exception("Database error on %s %s", request.method, request.url.path, exc_info=exc)
     return JSONResponse(
         status_code=500,
         content={"detail": "Internal server error"}
@@ -1,10 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Float, Index
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Float, Index, Enum, Computed
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, configure_mappers
 from sqlalchemy.sql import func
 from fastapi_users.db import SQLAlchemyBaseUserTable
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 
 Base = declarative_base()
 
@@ -27,34 +27,57 @@ class User(SQLAlchemyBaseUserTable[uuid.UUID], Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    family_trees = relationship("FamilyTree", back_populates="owner", cascade="all, delete-orphan")
+    family_trees = relationship("FamilyTree", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
 
 class FamilyTree(Base):
     __tablename__ = "family_trees"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     
+    # Denormalized person summary, maintained by PersonService
+    people_count = Column(Integer, default=0, server_default="0", nullable=False)
+    last_person_added_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Full-text search document, generated by Postgres from name and description
+    search_doc = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))",
+            persisted=True
+        )
+    ))
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     owner = relationship("User", back_populates="family_trees")
-    people = relationship("Person", back_populates="family_tree", cascade="all, delete-orphan")
+    people = relationship("Person", back_populates="family_tree", cascade="all, delete-orphan", passive_deletes=True)
     
     # Indexes
     __table_args__ = (
-        Index('ix_family_trees_owner_id', 'owner_id'),
+        # Serves the owner-scoped list (newest first, keyset paginated on
+        # created_at, id) and owner-scoped lookups
+        Index(
+            'ix_family_trees_owner',
+            'owner_id',
+            created_at.desc(),
+            id.desc()
+        ),
+        Index('ix_family_trees_search', 'search_doc', postgresql_using='gin'),
+        # Lets ownership checks read owner_id with an index-only scan
+        Index('ix_family_trees_id_owner', 'id', postgresql_include=['owner_id']),
     )
 
 class Person(Base):
     __tablename__ = "people"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    family_tree_id = Column(UUID(as_uuid=True), ForeignKey("family_trees.id"), nullable=False)
+    family_tree_id = Column(UUID(as_uuid=True), ForeignKey("family_trees.id", ondelete="CASCADE"), nullable=False)
     
     # Personal information
     first_name = Column(String(100), nullable=False)
@@ -75,27 +98,31 @@ class Person(Base):
     
     # Relationships
     family_tree = relationship("FamilyTree", back_populates="people")
-    files = relationship("PersonFile", back_populates="person", cascade="all, delete-orphan")
+    files = relationship("PersonFile", back_populates="person", cascade="all, delete-orphan", passive_deletes=True)
     
     # Relationship edges - outgoing relationships
     relationships_from = relationship(
         "Relationship", 
         foreign_keys="Relationship.from_person_id",
         back_populates="from_person",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     
     # Relationship edges - incoming relationships
     relationships_to = relationship(
         "Relationship",
         foreign_keys="Relationship.to_person_id", 
-        back_populates="to_person"
+        back_populates="to_person",
+        passive_deletes="all"
     )
     
     # Indexes
     __table_args__ = (
         Index('ix_people_family_tree_id', 'family_tree_id'),
         Index('ix_people_names', 'first_name', 'last_name'),
+        # Lets ownership checks resolve a person's tree with an index-only scan
+        Index('ix_people_id_tree', 'id', postgresql_include=['family_tree_id']),
     )
     
     @property
@@ -104,15 +131,17 @@ class Person(Base):
             return f"{self.first_name} {self.last_name}"
         return self.first_name
 
+RELATIONSHIP_TYPES = ("spouse", "parent", "child", "adopted_child", "adopted_parent")
+
 class Relationship(Base):
     __tablename__ = "relationships"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    from_person_id = Column(UUID(as_uuid=True), ForeignKey("people.id"), nullable=False)
-    to_person_id = Column(UUID(as_uuid=True), ForeignKey("people.id"), nullable=False)
+    from_person_id = Column(UUID(as_uuid=True), ForeignKey("people.id", ondelete="CASCADE"), nullable=False)
+    to_person_id = Column(UUID(as_uuid=True), ForeignKey("people.id", ondelete="CASCADE"), nullable=False)
     
     # Relationship type: spouse, parent, child, adopted_child, adopted_parent
-    relationship_type = Column(String(50), nullable=False)
+    relationship_type = Column(Enum(*RELATIONSHIP_TYPES, name="relationship_type"), nullable=False)
     
     # Optional date information
     start_date = Column(DateTime, nullable=True)  # marriage date, birth date, adoption date
@@ -134,17 +163,17 @@ class Relationship(Base):
     
     # Indexes
     __table_args__ = (
-        Index('ix_relationships_from_person', 'from_person_id'),
+        # Also covers from_person_id-only lookups through its leading column
+        Index('ix_relationships_from_person_type', 'from_person_id', 'relationship_type'),
         Index('ix_relationships_to_person', 'to_person_id'),
         Index('ix_relationships_type', 'relationship_type'),
-        Index('ix_relationships_active', 'is_active'),
     )
 
 class PersonFile(Base):
     __tablename__ = "person_files"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    person_id = Column(UUID(as_uuid=True), ForeignKey("people.id"), nullable=False)
+    person_id = Column(UUID(as_uuid=True), ForeignKey("people.id", ondelete="CASCADE"), nullable=False)
     
     # File information
     filename = Column(String(255), nullable=False)
@@ -165,6 +194,10 @@ class PersonFile(Base):
     
     # Indexes
     __table_args__ = (
-        Index('ix_person_files_person_id', 'person_id'),
+        # Serves a person's files, optionally filtered by type, newest first
+        Index('ix_person_files_person_type', 'person_id', 'file_type', uploaded_at.desc()),
         Index('ix_person_files_type', 'file_type'),
-    )
\ No newline at end of file
+    )
+
+# Resolve relationship() targets and compile every mapper at import time instead of on the first query
+configure_mappers()
\ No newline at end of file
@@ -38,6 +38,8 @@ class FamilyTreeUpdate(BaseModel):
 class FamilyTreeRead(FamilyTreeBase):
     id: uuid.UUID
     owner_id: uuid.UUID
+    people_count: int = 0
+    last_person_added_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
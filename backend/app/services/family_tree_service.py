@@ -1,24 +1,23 @@
-from typing import List
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, exists, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from fastapi import HTTPException, status
 import uuid
 
-from app.models.database import FamilyTree, Person, Relationship
+from app.core.ownership_cache import cache_owner_id, get_cached_owner_id, invalidate_owner_id
+from app.models.database import FamilyTree
 from app.schemas.schemas import (
     FamilyTreeCreate, 
-    FamilyTreeUpdate, 
-    FamilyTreeGraph,
-    GraphNode,
-    GraphEdge,
-    PersonRead,
-    RelationshipRead
+    FamilyTreeUpdate
 )
 
 class FamilyTreeService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_family_tree(self, owner_id: uuid.UUID, family_tree_data: FamilyTreeCreate) -> FamilyTree:
+    async def create_family_tree(self, owner_id: uuid.UUID, family_tree_data: FamilyTreeCreate) -> FamilyTree:
         """Create a new family tree"""
         db_family_tree = FamilyTree(
             owner_id=owner_id,
@@ -26,16 +25,17 @@ class FamilyTreeService:
         )
         
         self.db.add(db_family_tree)
-        self.db.commit()
-        self.db.refresh(db_family_tree)
+        await self.db.commit()
+        await self.db.refresh(db_family_tree)
         
         return db_family_tree
 
-    def get_family_tree(self, family_tree_id: uuid.UUID) -> FamilyTree:
+    async def get_family_tree(self, family_tree_id: uuid.UUID) -> FamilyTree:
         """Get a family tree by ID"""
-        family_tree = self.db.query(FamilyTree).filter(
-            FamilyTree.id == family_tree_id
-        ).first()
+        # Session.get reuses a row already loaded in this session (e.g. by get_owned)
+        family_tree = await self.db.get(
+            FamilyTree, family_tree_id, options=[raiseload("*")]
+        )
         
         if not family_tree:
             raise HTTPException(
@@ -45,69 +45,113 @@ class FamilyTreeService:
         
         return family_tree
 
-    def get_user_family_trees(self, owner_id: uuid.UUID) -> List[FamilyTree]:
-        """Get all family trees for a user"""
-        return self.db.query(FamilyTree).filter(
+    async def get_owned(self, family_tree_id: uuid.UUID, owner_id: uuid.UUID, action: str = "access") -> FamilyTree:
+        """Get a family tree only if it is owned by the given user"""
+        result = await self.db.execute(
+            select(FamilyTree).where(
+                FamilyTree.id == family_tree_id,
+                FamilyTree.owner_id == owner_id
+            ).options(raiseload("*"))
+        )
+        family_tree = result.scalar_one_or_none()
+        
+        if not family_tree:
+            # Only on a miss do we need to tell "not found" apart from "not yours"
+            tree_exists = await self.db.scalar(
+                select(exists().where(FamilyTree.id == family_tree_id))
+            )
+            
+            if not tree_exists:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Family tree not found"
+                )
+            
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Not authorized to {action} this family tree"
+            )
+        
+        return family_tree
+
+    async def get_owner_id(self, family_tree_id: uuid.UUID) -> uuid.UUID:
+        """Get only the owner ID of a family tree, for authorization checks"""
+        owner_id = get_cached_owner_id(family_tree_id)
+        if owner_id is not None:
+            return owner_id
+        
+        owner_id = await self.db.scalar(
+            select(FamilyTree.owner_id).where(FamilyTree.id == family_tree_id)
+        )
+        
+        if owner_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Family tree not found"
+            )
+        
+        cache_owner_id(family_tree_id, owner_id)
+        return owner_id
+
+    async def get_user_family_trees(
+        self,
+        owner_id: uuid.UUID,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None,
+        search: Optional[str] = None
+    ) -> List[FamilyTree]:
+        """Get family trees for a user, newest first, optionally one page at a time after a (created_at, id) key"""
+        query = select(FamilyTree).where(
             FamilyTree.owner_id == owner_id
-        ).order_by(FamilyTree.created_at.desc()).all()
+        ).order_by(
+            FamilyTree.created_at.desc(), FamilyTree.id.desc()
+        ).options(raiseload("*"))
+        
+        if search:
+            # Probe the GIN index on the generated tsvector instead of scanning with ILIKE
+            query = query.where(
+                FamilyTree.search_doc.bool_op("@@")(func.websearch_to_tsquery("simple", search))
+            )
+        
+        if after is not None:
+            # Keyset pagination: continue strictly after the cursor's sort key, so each
+            # page is a single index range scan no matter how deep it is
+            query = query.where(
+                tuple_(FamilyTree.created_at, FamilyTree.id) < tuple_(*after)
+            )
+        
+        if limit is not None:
+            query = query.limit(limit)
+        
+        result = await self.db.execute(query)
+        return result.scalars().all()
 
-    def update_family_tree(self, family_tree_id: uuid.UUID, update_data: FamilyTreeUpdate) -> FamilyTree:
+    async def update_family_tree(self, family_tree_id: uuid.UUID, update_data: FamilyTreeUpdate) -> FamilyTree:
         """Update a family tree"""
-        family_tree = self.get_family_tree(family_tree_id)
+        family_tree = await self.get_family_tree(family_tree_id)
         
         # Update only provided fields
         update_dict = update_data.dict(exclude_unset=True)
         for field, value in update_dict.items():
             setattr(family_tree, field, value)
         
-        self.db.commit()
-        self.db.refresh(family_tree)
+        await self.db.commit()
+        await self.db.refresh(family_tree)
         
         return family_tree
 
-    def delete_family_tree(self, family_tree_id: uuid.UUID) -> None:
+    async def delete_family_tree(self, family_tree_id: uuid.UUID) -> None:
         """Delete a family tree and all associated data"""
-        family_tree = self.get_family_tree(family_tree_id)
+        # People, relationships and files go with it via ON DELETE CASCADE
+        result = await self.db.execute(
+            delete(FamilyTree).where(FamilyTree.id == family_tree_id)
+        )
         
-        self.db.delete(family_tree)
-        self.db.commit()
-
-    def get_family_tree_graph(self, family_tree_id: uuid.UUID) -> FamilyTreeGraph:
-        """Get family tree data formatted for graph visualization"""
-        # Get all people in the family tree
-        people = self.db.query(Person).filter(
-            Person.family_tree_id == family_tree_id
-        ).all()
-        
-        # Get all relationships in the family tree
-        person_ids = [person.id for person in people]
-        relationships = self.db.query(Relationship).filter(
-            Relationship.from_person_id.in_(person_ids),
-            Relationship.to_person_id.in_(person_ids)
-        ).all()
-        
-        # Create graph nodes
-        nodes = []
-        for person in people:
-            person_read = PersonRead.from_orm(person)
-            node = GraphNode(
-                id=str(person.id),
-                type="person",
-                data=person_read
-            )
-            nodes.append(node)
-        
-        # Create graph edges
-        edges = []
-        for relationship in relationships:
-            relationship_read = RelationshipRead.from_orm(relationship)
-            edge = GraphEdge(
-                id=str(relationship.id),
-                source=str(relationship.from_person_id),
-                target=str(relationship.to_person_id),
-                type=relationship.relationship_type,
-                data=relationship_read
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Family tree not found"
             )
-            edges.append(edge)
         
-        return FamilyTreeGraph(nodes=nodes, edges=edges)
\ No newline at end of file
+        await self.db.commit()
+        invalidate_owner_id(family_tree_id)
\ No newline at end of file
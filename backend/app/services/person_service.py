@@ -1,28 +1,44 @@
-from typing import List
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, Dict, Iterable, List, Tuple
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload
+from sqlalchemy.sql import func
 from fastapi import HTTPException, status
 import uuid
 
-from app.models.database import Person
+from app.core.ownership_cache import invalidate_owner_id
+from app.models.database import Person, FamilyTree
 from app.schemas.schemas import PersonCreate, PersonUpdate
 
 class PersonService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_person(self, person_data: PersonCreate) -> Person:
+    async def create_person(self, person_data: PersonCreate) -> Person:
         """Create a new person"""
         db_person = Person(**person_data.dict())
         
         self.db.add(db_person)
-        self.db.commit()
-        self.db.refresh(db_person)
+        await self._adjust_people_count(person_data.family_tree_id, 1)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            # The only constraint a new person can break is the family tree foreign key: the
+            # tree was deleted after its owner was cached (e.g. by another worker)
+            await self.db.rollback()
+            invalidate_owner_id(person_data.family_tree_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Family tree not found"
+            )
+        await self.db.refresh(db_person)
         
         return db_person
 
-    def get_person(self, person_id: uuid.UUID) -> Person:
+    async def get_person(self, person_id: uuid.UUID) -> Person:
         """Get a person by ID"""
-        person = self.db.query(Person).filter(Person.id == person_id).first()
+        person = await self.db.get(Person, person_id, options=[raiseload("*")])
         
         if not person:
             raise HTTPException(
@@ -32,38 +48,126 @@ class PersonService:
         
         return person
 
-    def get_people_by_family_tree(self, family_tree_id: uuid.UUID) -> List[Person]:
-        """Get all people in a family tree"""
-        return self.db.query(Person).filter(
-            Person.family_tree_id == family_tree_id
-        ).order_by(Person.first_name, Person.last_name).all()
+    async def get_person_with_owner(self, person_id: uuid.UUID) -> Tuple[Person, uuid.UUID]:
+        """Get a person together with the owner ID of their family tree in one query"""
+        result = await self.db.execute(
+            select(Person, FamilyTree.owner_id).join(
+                FamilyTree, Person.family_tree_id == FamilyTree.id
+            ).where(Person.id == person_id).options(raiseload("*"))
+        )
+        row = result.first()
+        
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Person not found"
+            )
+        
+        return row.Person, row.owner_id
 
-    def update_person(self, person_id: uuid.UUID, update_data: PersonUpdate) -> Person:
+    async def get_owner_id(self, person_id: uuid.UUID) -> uuid.UUID:
+        """Get only the owner ID of a person's family tree, for authorization checks"""
+        owner_id = await self.db.scalar(
+            select(FamilyTree.owner_id).join(
+                Person, Person.family_tree_id == FamilyTree.id
+            ).where(Person.id == person_id)
+        )
+        
+        if owner_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Person not found"
+            )
+        
+        return owner_id
+
+    async def get_owned_person(self, person_id: uuid.UUID, owner_id: uuid.UUID, action: str = "access") -> Person:
+        """Get a person only if their family tree is owned by the given user"""
+        person, person_owner_id = await self.get_person_with_owner(person_id)
+        
+        if person_owner_id != owner_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Not authorized to {action} this person"
+            )
+        
+        return person
+
+    async def get_people_with_owners(self, person_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, Tuple[Person, uuid.UUID]]:
+        """Get several people with the owner IDs of their family trees in one query, keyed by person ID"""
+        # Callers only authorize and compare trees, so skip the bio and other text columns
+        result = await self.db.execute(
+            select(Person, FamilyTree.owner_id).join(
+                FamilyTree, Person.family_tree_id == FamilyTree.id
+            ).where(Person.id.in_(set(person_ids))).options(
+                load_only(Person.id, Person.family_tree_id, raiseload=True),
+                raiseload("*")
+            )
+        )
+        return {row.Person.id: (row.Person, row.owner_id) for row in result}
+
+    async def iter_people_by_family_tree(self, family_tree_id: uuid.UUID, batch_size: int = 500) -> AsyncIterator[Person]:
+        """Stream all people in a family tree from the database in batches"""
+        people = await self.db.stream_scalars(
+            select(Person).where(
+                Person.family_tree_id == family_tree_id
+            ).order_by(Person.first_name, Person.last_name).options(
+                raiseload("*")
+            ).execution_options(yield_per=batch_size)
+        )
+        
+        async for person in people:
+            yield person
+
+    async def update_person(self, person_id: uuid.UUID, update_data: PersonUpdate) -> Person:
         """Update a person"""
-        person = self.get_person(person_id)
+        person = await self.get_person(person_id)
         
         # Update only provided fields
         update_dict = update_data.dict(exclude_unset=True)
         for field, value in update_dict.items():
             setattr(person, field, value)
         
-        self.db.commit()
-        self.db.refresh(person)
+        await self.db.commit()
+        await self.db.refresh(person)
         
         return person
 
-    def delete_person(self, person_id: uuid.UUID) -> None:
+    async def delete_person(self, person_id: uuid.UUID) -> None:
         """Delete a person and all associated relationships"""
-        person = self.get_person(person_id)
+        # Relationships and files go with it via ON DELETE CASCADE
+        family_tree_id = await self.db.scalar(
+            delete(Person).where(Person.id == person_id).returning(Person.family_tree_id)
+        )
+        
+        if family_tree_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Person not found"
+            )
         
-        self.db.delete(person)
-        self.db.commit()
+        await self._adjust_people_count(family_tree_id, -1)
+        await self.db.commit()
 
-    def search_people(self, family_tree_id: uuid.UUID, search_term: str) -> List[Person]:
+    async def search_people(self, family_tree_id: uuid.UUID, search_term: str) -> List[Person]:
         """Search for people by name within a family tree"""
-        return self.db.query(Person).filter(
-            Person.family_tree_id == family_tree_id,
-            (Person.first_name.ilike(f"%{search_term}%") |
-             Person.last_name.ilike(f"%{search_term}%") |
-             Person.maiden_name.ilike(f"%{search_term}%"))
-        ).all()
\ No newline at end of file
+        result = await self.db.execute(
+            select(Person).where(
+                Person.family_tree_id == family_tree_id,
+                (Person.first_name.ilike(f"%{search_term}%") |
+                 Person.last_name.ilike(f"%{search_term}%") |
+                 Person.maiden_name.ilike(f"%{search_term}%"))
+            ).options(raiseload("*"))
+        )
+        return result.scalars().all()
+
+    async def _adjust_people_count(self, family_tree_id: uuid.UUID, delta: int) -> None:
+        """Keep the family tree's denormalized person summary in the same transaction"""
+        # Setting updated_at to itself keeps its onupdate hook from marking the tree as edited
+        values = {"people_count": FamilyTree.people_count + delta, "updated_at": FamilyTree.updated_at}
+        if delta > 0:
+            values["last_person_added_at"] = func.now()
+        
+        await self.db.execute(
+            update(FamilyTree).where(FamilyTree.id == family_tree_id).values(**values)
+        )
\ No newline at end of file
@@ -1,46 +1,52 @@
-from typing import List
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert, select, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, raiseload
 from fastapi import HTTPException, status
 import uuid
 
-from app.models.database import Relationship, Person
+from app.models.database import Relationship, Person, FamilyTree
 from app.schemas.schemas import RelationshipCreate, RelationshipUpdate
 
 class RelationshipService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_relationship(self, relationship_data: RelationshipCreate) -> Relationship:
+    async def create_relationship(
+        self,
+        relationship_data: RelationshipCreate,
+        family_tree_ids: Optional[Dict[uuid.UUID, uuid.UUID]] = None
+    ) -> Relationship:
         """Create a new relationship between two people"""
-        # Validate that both people exist
-        from_person = self.db.query(Person).filter(
-            Person.id == relationship_data.from_person_id
-        ).first()
-        to_person = self.db.query(Person).filter(
-            Person.id == relationship_data.to_person_id
-        ).first()
-        
-        if not from_person or not to_person:
+        # Validate that both people exist; callers that already loaded them (e.g. for
+        # ownership) pass their family tree IDs in
+        person_ids = {relationship_data.from_person_id, relationship_data.to_person_id}
+        if family_tree_ids is None:
+            family_tree_ids = await self._get_family_tree_ids(person_ids)
+        
+        if not person_ids <= family_tree_ids.keys():
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="One or both people not found"
             )
         
         # Validate that both people are in the same family tree
-        if from_person.family_tree_id != to_person.family_tree_id:
+        if family_tree_ids[relationship_data.from_person_id] != family_tree_ids[relationship_data.to_person_id]:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Both people must be in the same family tree"
             )
         
         # Check for duplicate relationships
-        existing = self.db.query(Relationship).filter(
-            Relationship.from_person_id == relationship_data.from_person_id,
-            Relationship.to_person_id == relationship_data.to_person_id,
-            Relationship.relationship_type == relationship_data.relationship_type,
-            Relationship.is_active == True
-        ).first()
+        result = await self.db.execute(
+            select(Relationship).where(
+                Relationship.from_person_id == relationship_data.from_person_id,
+                Relationship.to_person_id == relationship_data.to_person_id,
+                Relationship.relationship_type == relationship_data.relationship_type,
+                Relationship.is_active == True
+            )
+        )
+        existing = result.scalars().first()
         
         if existing:
             raise HTTPException(
@@ -48,19 +54,88 @@ class RelationshipService:
                 detail="This relationship already exists"
             )
         
-        db_relationship = Relationship(**relationship_data.dict())
-        
-        self.db.add(db_relationship)
-        self.db.commit()
-        self.db.refresh(db_relationship)
+        # INSERT ... RETURNING hands back server defaults without a refresh SELECT
+        db_relationship = await self.db.scalar(
+            insert(Relationship).returning(Relationship),
+            [relationship_data.dict()]
+        )
+        await self.db.commit()
         
         return db_relationship
 
-    def get_relationship(self, relationship_id: uuid.UUID) -> Relationship:
+    async def create_relationships(
+        self,
+        relationships_data: List[RelationshipCreate],
+        family_tree_ids: Optional[Dict[uuid.UUID, uuid.UUID]] = None
+    ) -> List[Relationship]:
+        """Create several relationships in one transaction with a single multi-row INSERT"""
+        # Validate that all people exist and each pair shares a family tree; callers that
+        # already loaded the people (e.g. for ownership) pass their family tree IDs in
+        person_ids = {
+            person_id
+            for relationship_data in relationships_data
+            for person_id in (relationship_data.from_person_id, relationship_data.to_person_id)
+        }
+        if family_tree_ids is None:
+            family_tree_ids = await self._get_family_tree_ids(person_ids)
+        
+        if not person_ids <= family_tree_ids.keys():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="One or more people not found"
+            )
+        
+        keys = set()
+        active_keys = set()
+        for relationship_data in relationships_data:
+            if family_tree_ids[relationship_data.from_person_id] != family_tree_ids[relationship_data.to_person_id]:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Both people must be in the same family tree"
+                )
+            
+            # Like the single create, only an active relationship makes another one a
+            # duplicate; checking in request order matches creating them one at a time
+            key = (relationship_data.from_person_id, relationship_data.to_person_id, relationship_data.relationship_type)
+            if key in active_keys:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="This relationship already exists"
+                )
+            keys.add(key)
+            if relationship_data.is_active:
+                active_keys.add(key)
+        
+        # Check for duplicates of existing relationships in one query
+        result = await self.db.execute(
+            select(Relationship.id).where(
+                tuple_(
+                    Relationship.from_person_id,
+                    Relationship.to_person_id,
+                    Relationship.relationship_type
+                ).in_(keys),
+                Relationship.is_active == True
+            ).limit(1)
+        )
+        
+        if result.first():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="This relationship already exists"
+            )
+        
+        db_relationships = await self.db.scalars(
+            insert(Relationship).returning(Relationship, sort_by_parameter_order=True),
+            [relationship_data.dict() for relationship_data in relationships_data]
+        )
+        db_relationships = db_relationships.all()
+        await self.db.commit()
+        
+        return db_relationships
+
+    async def get_relationship(self, relationship_id: uuid.UUID) -> Relationship:
         """Get a relationship by ID"""
-        relationship = self.db.query(Relationship).filter(
-            Relationship.id == relationship_id
-        ).first()
+        relationship = await self.db.get(Relationship, relationship_id)
         
         if not relationship:
             raise HTTPException(
@@ -70,59 +145,115 @@ class RelationshipService:
         
         return relationship
 
-    def get_person_relationships(self, person_id: uuid.UUID) -> List[Relationship]:
-        """Get all relationships for a specific person"""
-        return self.db.query(Relationship).filter(
-            or_(
-                Relationship.from_person_id == person_id,
-                Relationship.to_person_id == person_id
+    async def get_relationship_with_owners(self, relationship_id: uuid.UUID) -> Tuple[Relationship, uuid.UUID, uuid.UUID]:
+        """Get a relationship together with the family tree owner IDs of both people in one query"""
+        from_person = aliased(Person)
+        to_person = aliased(Person)
+        from_tree = aliased(FamilyTree)
+        to_tree = aliased(FamilyTree)
+        result = await self.db.execute(
+            select(
+                Relationship,
+                from_tree.owner_id.label("from_owner_id"),
+                to_tree.owner_id.label("to_owner_id")
+            ).join(
+                from_person, Relationship.from_person_id == from_person.id
+            ).join(
+                from_tree, from_person.family_tree_id == from_tree.id
+            ).join(
+                to_person, Relationship.to_person_id == to_person.id
+            ).join(
+                to_tree, to_person.family_tree_id == to_tree.id
+            ).where(Relationship.id == relationship_id)
+        )
+        row = result.first()
+        
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Relationship not found"
             )
-        ).all()
+        
+        return row.Relationship, row.from_owner_id, row.to_owner_id
+
+    async def get_owned_relationship(self, relationship_id: uuid.UUID, owner_id: uuid.UUID) -> Relationship:
+        """Get a relationship only if both people's family trees are owned by the given user"""
+        relationship, from_owner_id, to_owner_id = await self.get_relationship_with_owners(relationship_id)
+        
+        if from_owner_id != owner_id or to_owner_id != owner_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this family tree"
+            )
+        
+        return relationship
 
-    def get_family_tree_relationships(self, family_tree_id: uuid.UUID) -> List[Relationship]:
-        """Get all relationships in a family tree"""
-        # Get all people in the family tree first
-        people = self.db.query(Person).filter(
-            Person.family_tree_id == family_tree_id
-        ).all()
-        
-        person_ids = [person.id for person in people]
-        
-        return self.db.query(Relationship).filter(
-            Relationship.from_person_id.in_(person_ids),
-            Relationship.to_person_id.in_(person_ids)
-        ).all()
+    async def iter_person_relationships(self, person_id: uuid.UUID, batch_size: int = 500) -> AsyncIterator[Relationship]:
+        """Stream all relationships for a specific person from the database in batches"""
+        relationships = await self.db.stream_scalars(
+            select(Relationship).where(
+                or_(
+                    Relationship.from_person_id == person_id,
+                    Relationship.to_person_id == person_id
+                )
+            ).options(raiseload("*")).execution_options(yield_per=batch_size)
+        )
+        
+        async for relationship in relationships:
+            yield relationship
 
-    def update_relationship(self, relationship_id: uuid.UUID, update_data: RelationshipUpdate) -> Relationship:
+    async def iter_family_tree_relationships(self, family_tree_id: uuid.UUID, batch_size: int = 500) -> AsyncIterator[Relationship]:
+        """Stream all relationships in a family tree from the database in batches"""
+        # Join both people to the tree instead of sending every person ID back in an IN list
+        from_person = aliased(Person)
+        to_person = aliased(Person)
+        relationships = await self.db.stream_scalars(
+            select(Relationship).join(
+                from_person, Relationship.from_person_id == from_person.id
+            ).join(
+                to_person, Relationship.to_person_id == to_person.id
+            ).where(
+                from_person.family_tree_id == family_tree_id,
+                to_person.family_tree_id == family_tree_id
+            ).options(raiseload("*")).execution_options(yield_per=batch_size)
+        )
+        
+        async for relationship in relationships:
+            yield relationship
+
+    async def update_relationship(self, relationship_id: uuid.UUID, update_data: RelationshipUpdate) -> Relationship:
         """Update a relationship"""
-        relationship = self.get_relationship(relationship_id)
+        relationship = await self.get_relationship(relationship_id)
         
         # Update only provided fields
         update_dict = update_data.dict(exclude_unset=True)
         for field, value in update_dict.items():
             setattr(relationship, field, value)
         
-        self.db.commit()
-        self.db.refresh(relationship)
+        await self.db.commit()
+        await self.db.refresh(relationship)
         
         return relationship
 
-    def delete_relationship(self, relationship_id: uuid.UUID) -> None:
+    async def delete_relationship(self, relationship_id: uuid.UUID) -> None:
         """Delete a relationship"""
-        relationship = self.get_relationship(relationship_id)
+        relationship = await self.get_relationship(relationship_id)
         
-        self.db.delete(relationship)
-        self.db.commit()
+        await self.db.delete(relationship)
+        await self.db.commit()
 
-    def get_spouses(self, person_id: uuid.UUID) -> List[Person]:
+    async def get_spouses(self, person_id: uuid.UUID) -> List[Person]:
         """Get all spouses of a person"""
-        spouse_relationships = self.db.query(Relationship).filter(
-            or_(
-                (Relationship.from_person_id == person_id) & (Relationship.relationship_type == "spouse"),
-                (Relationship.to_person_id == person_id) & (Relationship.relationship_type == "spouse")
-            ),
-            Relationship.is_active == True
-        ).all()
+        result = await self.db.execute(
+            select(Relationship).where(
+                or_(
+                    (Relationship.from_person_id == person_id) & (Relationship.relationship_type == "spouse"),
+                    (Relationship.to_person_id == person_id) & (Relationship.relationship_type == "spouse")
+                ),
+                Relationship.is_active == True
+            )
+        )
+        spouse_relationships = result.scalars().all()
         
         spouse_ids = []
         for rel in spouse_relationships:
@@ -131,34 +262,50 @@ class RelationshipService:
             else:
                 spouse_ids.append(rel.from_person_id)
         
-        return self.db.query(Person).filter(Person.id.in_(spouse_ids)).all()
+        result = await self.db.execute(select(Person).where(Person.id.in_(spouse_ids)))
+        return result.scalars().all()
 
-    def get_children(self, person_id: uuid.UUID) -> List[Person]:
+    async def get_children(self, person_id: uuid.UUID) -> List[Person]:
         """Get all children of a person"""
-        child_relationships = self.db.query(Relationship).filter(
-            Relationship.from_person_id == person_id,
-            or_(
-                Relationship.relationship_type == "child",
-                Relationship.relationship_type == "adopted_child"
-            ),
-            Relationship.is_active == True
-        ).all()
+        result = await self.db.execute(
+            select(Relationship).where(
+                Relationship.from_person_id == person_id,
+                or_(
+                    Relationship.relationship_type == "child",
+                    Relationship.relationship_type == "adopted_child"
+                ),
+                Relationship.is_active == True
+            )
+        )
+        child_relationships = result.scalars().all()
         
         child_ids = [rel.to_person_id for rel in child_relationships]
         
-        return self.db.query(Person).filter(Person.id.in_(child_ids)).all()
+        result = await self.db.execute(select(Person).where(Person.id.in_(child_ids)))
+        return result.scalars().all()
 
-    def get_parents(self, person_id: uuid.UUID) -> List[Person]:
+    async def get_parents(self, person_id: uuid.UUID) -> List[Person]:
         """Get all parents of a person"""
-        parent_relationships = self.db.query(Relationship).filter(
-            Relationship.to_person_id == person_id,
-            or_(
-                Relationship.relationship_type == "parent",
-                Relationship.relationship_type == "adopted_parent"
-            ),
-            Relationship.is_active == True
-        ).all()
+        result = await self.db.execute(
+            select(Relationship).where(
+                Relationship.to_person_id == person_id,
+                or_(
+                    Relationship.relationship_type == "parent",
+                    Relationship.relationship_type == "adopted_parent"
+                ),
+                Relationship.is_active == True
+            )
+        )
+        parent_relationships = result.scalars().all()
         
         parent_ids = [rel.from_person_id for rel in parent_relationships]
         
-        return self.db.query(Person).filter(Person.id.in_(parent_ids)).all()
\ No newline at end of file
+        result = await self.db.execute(select(Person).where(Person.id.in_(parent_ids)))
+        return result.scalars().all()
+
+    async def _get_family_tree_ids(self, person_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, uuid.UUID]:
+        """Map each existing person to their family tree with one query"""
+        result = await self.db.execute(
+            select(Person.id, Person.family_tree_id).where(Person.id.in_(set(person_ids)))
+        )
+        return dict(result.all())
\ No newline at end of file
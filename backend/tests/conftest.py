@@ -0,0 +1,50 @@
+import os
+import uuid
+import pytest
+
+# Tests run against a disposable Postgres named by DATABASE_URL. Each TestClient runs its
+# own event loop, so connections must not be pooled across tests
+os.environ.setdefault("SERVERLESS", "true")
+
+# Exceeding an endpoint's query_budget() raises QueryBudgetExceeded through the TestClient
+os.environ.setdefault("QUERY_BUDGET_STRICT", "true")
+
+from fastapi.testclient import TestClient
+
+API = "/api/v1"
+PASSWORD = "test-password-123"
+
+@pytest.fixture(scope="module")
+def client():
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture(scope="module")
+def make_owner(client):
+    """Factory registering a new user and returning their ID and bearer auth headers"""
+    def register():
+        email = f"{uuid.uuid4().hex}@example.com"
+        user = client.post("/auth/register", json={"email": email, "password": PASSWORD}).json()
+        token = client.post("/auth/login", data={"username": email, "password": PASSWORD}).json()["access_token"]
+        return uuid.UUID(user["id"]), {"Authorization": f"Bearer {token}"}
+    
+    return register
+
+@pytest.fixture(scope="module")
+def owner(make_owner):
+    """A registered user's ID and bearer auth headers, shared by a test module"""
+    return make_owner()
+
+@pytest.fixture
+def tree(client, owner):
+    """A fresh family tree ID and the IDs of three people in it"""
+    _, headers = owner
+    tree_id = client.post(f"{API}/family-trees/", json={"name": "Test"}, headers=headers).json()["id"]
+    person_ids = [
+        client.post(
+            f"{API}/people/", json={"family_tree_id": tree_id, "first_name": name}, headers=headers
+        ).json()["id"]
+        for name in ("Ada", "Ben", "Cy")
+    ]
+    return tree_id, person_ids
\ No newline at end of file
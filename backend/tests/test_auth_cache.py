@@ -0,0 +1,58 @@
+import uuid
+from sqlalchemy import create_engine, update
+
+from app.core.auth_cache import get_cached_user, invalidate_user
+from app.core.config import settings
+from app.models.database import User
+
+# Registration password used by conftest's make_owner
+PASSWORD = "test-password-123"
+
+def make_superuser(make_owner):
+    user_id, headers = make_owner()
+    engine = create_engine(settings.DATABASE_URL)
+    with engine.begin() as connection:
+        connection.execute(update(User).where(User.id == user_id).values(is_superuser=True))
+    engine.dispose()
+    invalidate_user(user_id)
+    return headers
+
+def token(headers):
+    return headers["Authorization"].removeprefix("Bearer ")
+
+def test_password_change_evicts_cached_user(client, make_owner):
+    user_id, headers = make_owner()
+    email = client.get("/users/me", headers=headers).json()["email"]
+    assert get_cached_user(token(headers)) is not None
+    
+    response = client.patch("/users/me", json={"password": "new-password-456"}, headers=headers)
+    assert response.status_code == 200
+    assert get_cached_user(token(headers)) is None
+    
+    assert client.post("/auth/login", data={"username": email, "password": PASSWORD}).status_code == 400
+    assert client.post("/auth/login", data={"username": email, "password": "new-password-456"}).status_code == 200
+
+def test_profile_change_is_visible_on_next_request(client, make_owner):
+    _, headers = make_owner()
+    client.get("/users/me", headers=headers)
+    
+    email = f"{uuid.uuid4().hex}@example.com"
+    client.patch("/users/me", json={"email": email}, headers=headers)
+    assert client.get("/users/me", headers=headers).json()["email"] == email
+
+def test_deactivated_user_is_rejected_immediately(client, make_owner):
+    admin_headers = make_superuser(make_owner)
+    user_id, headers = make_owner()
+    assert client.get("/users/me", headers=headers).status_code == 200
+    
+    response = client.patch(f"/users/{user_id}", json={"is_active": False}, headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get("/users/me", headers=headers).status_code == 401
+
+def test_deleted_user_is_rejected_immediately(client, make_owner):
+    admin_headers = make_superuser(make_owner)
+    user_id, headers = make_owner()
+    assert client.get("/users/me", headers=headers).status_code == 200
+    
+    assert client.delete(f"/users/{user_id}", headers=admin_headers).status_code == 204
+    assert client.get("/users/me", headers=headers).status_code == 401
\ No newline at end of file
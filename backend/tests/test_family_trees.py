@@ -0,0 +1,148 @@
+import uuid
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import create_engine, update
+
+from app.core.config import settings
+from app.models.database import FamilyTree
+from app.schemas.schemas import FamilyTreeGraph
+
+API = "/api/v1"
+
+def create_trees(client, headers, names):
+    return [
+        client.post(f"{API}/family-trees/", json={"name": name}, headers=headers).json()["id"]
+        for name in names
+    ]
+
+def set_created_at(tree_ids, created_at):
+    """Give several trees the same created_at so pages must break ties on id"""
+    engine = create_engine(settings.DATABASE_URL)
+    with engine.begin() as connection:
+        connection.execute(
+            update(FamilyTree).where(FamilyTree.id.in_(tree_ids)).values(created_at=created_at)
+        )
+    engine.dispose()
+
+def list_pages(client, headers, limit, **params):
+    """Follow X-Next-Cursor until the last page, returning each page's tree IDs"""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(
+            f"{API}/family-trees/",
+            params={"limit": limit, **params, **({"after": cursor} if cursor else {})},
+            headers=headers
+        )
+        assert response.status_code == 200
+        pages.append([family_tree["id"] for family_tree in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+@pytest.fixture
+def fresh_owner(make_owner):
+    """A user with no family trees yet"""
+    return make_owner()
+
+def test_cursor_pages_cover_every_tree_once_in_order(client, fresh_owner):
+    headers = fresh_owner[1]
+    tree_ids = create_trees(client, headers, ["One", "Two", "Three", "Four", "Five"])
+    set_created_at(tree_ids[1:4], datetime(2024, 1, 1, tzinfo=timezone.utc))
+    
+    expected = [family_tree["id"] for family_tree in client.get(f"{API}/family-trees/", headers=headers).json()]
+    assert sorted(expected) == sorted(tree_ids)
+    
+    pages = list_pages(client, headers, limit=2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [tree_id for page in pages for tree_id in page] == expected
+    
+    # Ties on created_at are ordered by id, newest first
+    tied = [tree_id for tree_id in expected if tree_id in tree_ids[1:4]]
+    assert tied == sorted(tied, key=uuid.UUID, reverse=True)
+
+def test_cursor_survives_deleting_its_tree(client, fresh_owner):
+    headers = fresh_owner[1]
+    create_trees(client, headers, ["One", "Two", "Three"])
+    
+    response = client.get(f"{API}/family-trees/", params={"limit": 1}, headers=headers)
+    cursor = response.headers["X-Next-Cursor"]
+    client.delete(f"{API}/family-trees/{response.json()[0]['id']}", headers=headers)
+    
+    response = client.get(f"{API}/family-trees/", params={"limit": 2, "after": cursor}, headers=headers)
+    assert len(response.json()) == 2
+
+def test_unpaginated_list_has_no_cursor(client, fresh_owner):
+    headers = fresh_owner[1]
+    create_trees(client, headers, ["One", "Two"])
+    
+    response = client.get(f"{API}/family-trees/", headers=headers)
+    assert len(response.json()) == 2
+    assert "X-Next-Cursor" not in response.headers
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", str(uuid.uuid4()), "bm90fGEgY3Vyc29y"])
+def test_invalid_cursor_returns_400(client, owner, cursor):
+    response = client.get(f"{API}/family-trees/", params={"after": cursor}, headers=owner[1])
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid pagination cursor"}
+
+def test_search_matches_name_and_description(client, fresh_owner):
+    headers = fresh_owner[1]
+    trees = {
+        "Smith family": "Irish roots",
+        "Jones": None,
+        "Brown": "Cousins of the Smiths and smith in-laws",
+    }
+    for name, description in trees.items():
+        client.post(f"{API}/family-trees/", json={"name": name, "description": description}, headers=headers)
+
+    def search(query):
+        response = client.get(f"{API}/family-trees/", params={"search": query}, headers=headers)
+        return sorted(family_tree["name"] for family_tree in response.json())
+    
+    assert search("smith") == ["Brown", "Smith family"]
+    assert search("irish roots") == ["Smith family"]
+    assert search("smith -irish") == ["Brown"]
+    assert search("nobody") == []
+
+def test_search_results_paginate(client, fresh_owner):
+    headers = fresh_owner[1]
+    create_trees(client, headers, ["Smith A", "Smith B", "Smith C", "Jones"])
+    
+    pages = list_pages(client, headers, limit=2, search="smith")
+    assert [len(page) for page in pages] == [2, 1]
+
+def test_graph_streams_nodes_and_edges(client, owner, tree):
+    tree_id, (ada, ben, cy) = tree
+    headers = owner[1]
+    for from_id, to_id, relationship_type in ((ada, cy, "parent"), (ada, ben, "spouse")):
+        client.post(
+            f"{API}/relationships/",
+            json={"from_person_id": from_id, "to_person_id": to_id, "relationship_type": relationship_type},
+            headers=headers
+        )
+    
+    response = client.get(f"{API}/family-trees/{tree_id}/graph", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    graph = FamilyTreeGraph.model_validate(response.json())
+    
+    assert [node.id for node in graph.nodes] == [ada, ben, cy]
+    assert [node.data.full_name for node in graph.nodes] == ["Ada", "Ben", "Cy"]
+    assert {node.type for node in graph.nodes} == {"person"}
+    assert sorted((edge.source, edge.target, edge.type) for edge in graph.edges) == sorted(
+        [(ada, cy, "parent"), (ada, ben, "spouse")]
+    )
+    assert all(edge.id == str(edge.data.id) for edge in graph.edges)
+
+def test_empty_tree_graph(client, owner):
+    headers = owner[1]
+    tree_id = client.post(f"{API}/family-trees/", json={"name": "Empty"}, headers=headers).json()["id"]
+    
+    response = client.get(f"{API}/family-trees/{tree_id}/graph", headers=headers)
+    assert response.json() == {"nodes": [], "edges": []}
+
+def test_graph_of_another_users_tree_is_forbidden(client, make_owner, tree):
+    _, headers = make_owner()
+    response = client.get(f"{API}/family-trees/{tree[0]}/graph", headers=headers)
+    assert response.status_code == 403
\ No newline at end of file
@@ -0,0 +1,102 @@
+import uuid
+from sqlalchemy import create_engine, delete
+
+from app.core.config import settings
+from app.models.database import FamilyTree
+from app.schemas.schemas import PersonRead, RelationshipRead
+
+API = "/api/v1"
+
+def get_tree(client, headers, tree_id):
+    return client.get(f"{API}/family-trees/{tree_id}", headers=headers).json()
+
+def test_people_count_tracks_creates_and_deletes(client, owner, tree):
+    tree_id, (ada, _, _) = tree
+    headers = owner[1]
+    before = get_tree(client, headers, tree_id)
+    assert before["people_count"] == 3
+    assert before["last_person_added_at"] is not None
+    
+    client.post(f"{API}/people/", json={"family_tree_id": tree_id, "first_name": "Dee"}, headers=headers)
+    assert get_tree(client, headers, tree_id)["people_count"] == 4
+    
+    client.delete(f"{API}/people/{ada}", headers=headers)
+    assert get_tree(client, headers, tree_id)["people_count"] == 3
+
+def test_adding_people_does_not_mark_tree_updated(client, owner, tree):
+    tree_id, (ada, _, _) = tree
+    headers = owner[1]
+    updated_at = get_tree(client, headers, tree_id)["updated_at"]
+    
+    client.post(f"{API}/people/", json={"family_tree_id": tree_id, "first_name": "Dee"}, headers=headers)
+    client.delete(f"{API}/people/{ada}", headers=headers)
+    assert get_tree(client, headers, tree_id)["updated_at"] == updated_at
+    
+    # A real edit still moves it
+    client.put(f"{API}/family-trees/{tree_id}", json={"name": "Renamed"}, headers=headers)
+    assert get_tree(client, headers, tree_id)["updated_at"] != updated_at
+
+def test_adding_person_to_tree_deleted_elsewhere_returns_404(client, owner):
+    headers = owner[1]
+    tree_id = client.post(f"{API}/family-trees/", json={"name": "Doomed"}, headers=headers).json()["id"]
+    # Caches the tree's owner in this process
+    client.post(f"{API}/people/", json={"family_tree_id": tree_id, "first_name": "Ada"}, headers=headers)
+    
+    # Delete the tree behind this process's back, as another worker would
+    engine = create_engine(settings.DATABASE_URL)
+    with engine.begin() as connection:
+        connection.execute(delete(FamilyTree).where(FamilyTree.id == uuid.UUID(tree_id)))
+    engine.dispose()
+    
+    for _ in range(2):
+        response = client.post(f"{API}/people/", json={"family_tree_id": tree_id, "first_name": "Ben"}, headers=headers)
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Family tree not found"}
+
+def test_people_list_streams_person_reads_in_name_order(client, owner, tree):
+    tree_id, person_ids = tree
+    headers = owner[1]
+    client.post(f"{API}/people/", json={"family_tree_id": tree_id, "first_name": "Abe", "last_name": "Zed"}, headers=headers)
+    
+    response = client.get(f"{API}/people/family-tree/{tree_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    people = [PersonRead.model_validate(person) for person in response.json()]
+    
+    assert [person.full_name for person in people] == ["Abe Zed", "Ada", "Ben", "Cy"]
+    assert [str(person.id) for person in people[1:]] == person_ids
+    assert {str(person.family_tree_id) for person in people} == {tree_id}
+
+def test_empty_lists_stream_as_empty_arrays(client, owner):
+    headers = owner[1]
+    tree_id = client.post(f"{API}/family-trees/", json={"name": "Empty"}, headers=headers).json()["id"]
+    person_id = client.post(
+        f"{API}/people/", json={"family_tree_id": tree_id, "first_name": "Ada"}, headers=headers
+    ).json()["id"]
+    
+    assert client.get(f"{API}/relationships/person/{person_id}", headers=headers).json() == []
+    assert client.get(f"{API}/relationships/family-tree/{tree_id}", headers=headers).json() == []
+    
+    client.delete(f"{API}/people/{person_id}", headers=headers)
+    assert client.get(f"{API}/people/family-tree/{tree_id}", headers=headers).json() == []
+
+def test_relationship_lists_stream_relationship_reads(client, owner, tree):
+    tree_id, (ada, ben, cy) = tree
+    headers = owner[1]
+    client.post(
+        f"{API}/relationships/",
+        json={"from_person_id": ada, "to_person_id": ben, "relationship_type": "spouse", "notes": "Married"},
+        headers=headers
+    )
+    client.post(
+        f"{API}/relationships/",
+        json={"from_person_id": cy, "to_person_id": ada, "relationship_type": "child"},
+        headers=headers
+    )
+    
+    for url in (f"{API}/relationships/person/{ada}", f"{API}/relationships/family-tree/{tree_id}"):
+        relationships = [RelationshipRead.model_validate(item) for item in client.get(url, headers=headers).json()]
+        assert sorted(
+            (str(item.from_person_id), str(item.to_person_id), item.relationship_type, item.notes)
+            for item in relationships
+        ) == sorted([(ada, ben, "spouse", "Married"), (cy, ada, "child", None)])
\ No newline at end of file
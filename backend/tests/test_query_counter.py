@@ -0,0 +1,30 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_database_session
+from app.core.query_counter import QueryBudgetExceeded, QueryCounterMiddleware
+
+def build_app(budget: int) -> FastAPI:
+    """App with one endpoint that runs two statements through the request's session"""
+    app = FastAPI()
+    app.add_middleware(QueryCounterMiddleware, budget=budget, strict=True)
+
+    @app.get("/two-queries")
+    async def two_queries(db: AsyncSession = Depends(get_database_session)):
+        await db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 2"))
+        return {"ok": True}
+    
+    return app
+
+def test_request_within_budget_succeeds():
+    with TestClient(build_app(budget=2)) as client:
+        assert client.get("/two-queries").json() == {"ok": True}
+
+def test_request_over_budget_raises_in_strict_mode():
+    with TestClient(build_app(budget=1)) as client:
+        with pytest.raises(QueryBudgetExceeded, match="ran 2 SQL statements"):
+            client.get("/two-queries")
\ No newline at end of file
@@ -0,0 +1,85 @@
+import uuid
+
+from app.core.auth_cache import invalidate_user
+from app.core.ownership_cache import invalidate_owner_id
+
+# conftest turns on QUERY_BUDGET_STRICT, so a route that runs more statements than its
+# query_budget() raises QueryBudgetExceeded out of the client call and fails the test
+API = "/api/v1"
+
+def miss_caches(owner, tree_id):
+    """Make the next request pay for the user and tree owner lookups, its worst case"""
+    invalidate_user(owner[0])
+    invalidate_owner_id(uuid.UUID(tree_id))
+
+def create_relationship(client, headers, from_person_id, to_person_id, relationship_type="parent"):
+    response = client.post(
+        f"{API}/relationships/",
+        json={"from_person_id": from_person_id, "to_person_id": to_person_id, "relationship_type": relationship_type},
+        headers=headers
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+def test_create_relationship(client, owner, tree):
+    tree_id, (ada, ben, _) = tree
+    miss_caches(owner, tree_id)
+    create_relationship(client, owner[1], ada, ben)
+
+def test_create_relationships_batch(client, owner, tree):
+    tree_id, (ada, ben, cy) = tree
+    miss_caches(owner, tree_id)
+    response = client.post(
+        f"{API}/relationships/batch",
+        json=[
+            {"from_person_id": ada, "to_person_id": ben, "relationship_type": "parent"},
+            {"from_person_id": ada, "to_person_id": cy, "relationship_type": "parent"},
+            {"from_person_id": ben, "to_person_id": cy, "relationship_type": "spouse"},
+        ],
+        headers=owner[1]
+    )
+    assert response.status_code == 201
+    assert len(response.json()) == 3
+
+def test_get_update_delete_relationship(client, owner, tree):
+    tree_id, (ada, ben, _) = tree
+    relationship_id = create_relationship(client, owner[1], ada, ben)
+    
+    miss_caches(owner, tree_id)
+    assert client.get(f"{API}/relationships/{relationship_id}", headers=owner[1]).status_code == 200
+    
+    miss_caches(owner, tree_id)
+    response = client.put(f"{API}/relationships/{relationship_id}", json={"notes": "updated"}, headers=owner[1])
+    assert response.json()["notes"] == "updated"
+    
+    miss_caches(owner, tree_id)
+    assert client.delete(f"{API}/relationships/{relationship_id}", headers=owner[1]).status_code == 200
+
+def test_list_relationships(client, owner, tree):
+    tree_id, (ada, ben, cy) = tree
+    create_relationship(client, owner[1], ada, ben)
+    create_relationship(client, owner[1], ada, cy)
+    
+    miss_caches(owner, tree_id)
+    assert len(client.get(f"{API}/relationships/person/{ada}", headers=owner[1]).json()) == 2
+    
+    miss_caches(owner, tree_id)
+    assert len(client.get(f"{API}/relationships/family-tree/{tree_id}", headers=owner[1]).json()) == 2
+
+def test_batch_duplicates_match_single_create(client, owner, tree):
+    _, (ada, ben, cy) = tree
+
+    def batch(*items):
+        return client.post(
+            f"{API}/relationships/batch",
+            json=[
+                {"from_person_id": from_id, "to_person_id": to_id, "relationship_type": "parent", "is_active": is_active}
+                for from_id, to_id, is_active in items
+            ],
+            headers=owner[1]
+        )
+    
+    # Only an active relationship blocks another, earlier in the batch or in the database
+    assert batch((ada, ben, False), (ada, ben, True)).status_code == 201
+    assert batch((ada, cy, True), (ada, cy, False)).status_code == 400
+    assert batch((ada, ben, False)).status_code == 400
\ No newline at end of file